@@ -6,6 +6,11 @@ Optimisé pour les performances et la cohérence des données analytiques
 
 import pandas as pd
 import numpy as np
+import io
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from pathlib import Path
 from datetime import datetime, timedelta
 import logging
@@ -14,8 +19,9 @@ from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String,
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import redis
-import json
+import orjson
 from typing import Optional, Dict, List, Any
 
 # Configuration
@@ -24,6 +30,32 @@ REDIS_URL = "redis://redis:6379/0"
 DATA_DIR = Path("data/processed")
 LATEST_DATA_FILE = DATA_DIR / "latest_covid_processed.parquet"
 
+# Colonnes chargées dans la table covid_daily_data
+COVID_RECORD_COLUMNS = [
+    'iso_code', 'location', 'date', 'population',
+    'total_cases', 'new_cases', 'total_deaths', 'new_deaths',
+    'total_vaccinations', 'people_vaccinated', 'people_fully_vaccinated',
+    'new_vaccinations', 'stringency_index',
+    'incidence_rate_100k', 'death_rate_100k', 'case_fatality_rate', 'vaccination_rate',
+    'new_cases_7day_avg', 'new_deaths_7day_avg', 'incidence_rate_100k_7day_avg',
+    'data_quality_score', 'last_updated'
+]
+
+# Nombre de lignes par lot COPY vers la table de staging
+COPY_CHUNK_SIZE = 10000
+
+# Colonnes lues depuis le Parquet (projection : les autres colonnes ne sont pas décodées)
+PARQUET_COLUMNS = [col for col in COVID_RECORD_COLUMNS if col != 'last_updated']
+
+# Colonnes à faible cardinalité chargées en Categorical (dictionnaire Parquet)
+CATEGORICAL_COLUMNS = ['iso_code', 'location']
+
+# Autres chaînes en mémoire Arrow plutôt qu'en objets Python
+ARROW_TYPES_MAPPING = {
+    pa.string(): pd.ArrowDtype(pa.string()),
+    pa.large_string(): pd.ArrowDtype(pa.large_string())
+}
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -122,12 +154,77 @@ def create_tables(engine):
     # Création des tables
     metadata.create_all(engine)
     logger.info("✅ Tables créées/vérifiées dans PostgreSQL")
+    
+    return metadata
+
+def calculate_trends(last_14: pd.DataFrame, column: str = 'new_cases') -> pd.Series:
+    """Calcule la tendance 7 jours par pays en une passe (même règle que l'API /summary)"""
+    grouped = last_14.groupby('iso_code', sort=False, observed=True)[column]
+    rolling_7 = grouped.rolling(7, min_periods=1).mean().droplevel(0).reindex(last_14.index).to_numpy()
+    position = grouped.cumcount().to_numpy()
+    size = grouped.transform('size').to_numpy()
+    countries = last_14['iso_code'].to_numpy()
+    
+    # Moyenne des 7 derniers jours (dernière ligne) et des 7 précédents (7e ligne de la fenêtre)
+    is_last = position == size - 1
+    is_previous = position == 6
+    recent = rolling_7[is_last]
+    previous = pd.Series(rolling_7[is_previous], index=countries[is_previous]).reindex(countries[is_last]).to_numpy()
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(previous > 0, (recent - previous) / previous, 0)
+    
+    trend = np.select(
+        [size[is_last] < 7, np.isnan(recent) | np.isnan(previous), change > 0.1, change < -0.1],
+        ['insufficient_data', 'no_data', 'increasing', 'decreasing'],
+        default='stable'
+    )
+    return pd.Series(trend, index=countries[is_last])
+
+def read_processed_parquet(path: Path, columns: List[str]) -> pd.DataFrame:
+    """Lit le Parquet traité (mmap, projection de colonnes, conversion Arrow -> pandas sans copie superflue)"""
+    available_columns = pq.read_schema(path).names
+    table = pq.read_table(
+        path,
+        columns=[col for col in columns if col in available_columns],
+        read_dictionary=CATEGORICAL_COLUMNS,
+        memory_map=True,
+        pre_buffer=True,
+        use_threads=True
+    )
+    # ignore_metadata : les entiers nullables (Int32/Int64) reviennent en float64 NaN, non en pd.NA
+    df = table.to_pandas(split_blocks=True, self_destruct=True, ignore_metadata=True,
+                         types_mapper=ARROW_TYPES_MAPPING.get)
+    del table
+    
+    # Catégories triées pour que les tris (ex. par location) restent alphabétiques
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def select_latest_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Retourne les lignes de la date la plus récente (borne searchsorted si df est trié par date)"""
+    if df.empty:
+        return df
+    if df['date'].is_monotonic_increasing:
+        return df.iloc[df['date'].searchsorted(df['date'].iat[-1]):]
+    return df[df['date'] == df['date'].max()]
 
 class CovidETL:
     """Classe principale pour l'ETL des données COVID"""
     
     def __init__(self, database_url: str, redis_url: Optional[str] = None):
-        self.engine = create_engine(database_url, pool_pre_ping=True)
+        # executemany psycopg2 groupé (execute_values / execute_batch) pour limiter les allers-retours
+        self.engine = create_engine(
+            database_url,
+            pool_pre_ping=True,
+            executemany_mode='values_plus_batch',
+            insertmanyvalues_page_size=1000,
+            executemany_batch_page_size=500
+        )
         self.Session = sessionmaker(bind=self.engine)
         
         # Cache Redis optionnel
@@ -140,8 +237,11 @@ class CovidETL:
             except Exception as e:
                 logger.warning(f"Redis non disponible: {e}")
         
-        # Création des tables
-        create_tables(self.engine)
+        # Création des tables (les objets Table sont conservés : pas de réflexion à chaque appel)
+        self.metadata = create_tables(self.engine)
+        self.covid_table = self.metadata.tables['covid_daily_data']
+        self.alerts_table = self.metadata.tables['covid_alerts']
+        self.summary_table = self.metadata.tables['covid_daily_summary']
     
     @contextmanager
     def get_session(self):
@@ -156,26 +256,24 @@ class CovidETL:
         finally:
             session.close()
     
-    def calculate_data_quality_score(self, row: pd.Series) -> float:
-        """Calcule un score de qualité des données pour une ligne"""
-        score = 100.0
+    def calculate_data_quality_score(self, df: pd.DataFrame) -> np.ndarray:
+        """Calcule un score de qualité des données pour toutes les lignes (vectorisé)"""
+        score = np.full(len(df), 100.0)
         
         # Pénalités pour valeurs manquantes
         key_fields = ['new_cases', 'total_cases', 'population']
         for field in key_fields:
-            if pd.isna(row.get(field)):
-                score -= 15
+            score -= 15 * df[field].isna().to_numpy()
         
-        # Pénalités pour valeurs aberrantes
-        if not pd.isna(row.get('new_cases')) and row.get('new_cases', 0) < 0:
-            score -= 10
+        # Pénalités pour valeurs aberrantes (NaN < 0 et NaN > 20 donnent False)
+        score -= 10 * (df['new_cases'] < 0).fillna(False).to_numpy()
         
-        if not pd.isna(row.get('case_fatality_rate')) and row.get('case_fatality_rate', 0) > 20:
-            score -= 5
+        if 'case_fatality_rate' in df.columns:
+            score -= 5 * (df['case_fatality_rate'] > 20).fillna(False).to_numpy()
         
-        return max(0, score)
+        return np.clip(score, 0, None)
     
-    def detect_alerts(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def detect_alerts(self, df: pd.DataFrame, latest_data: Optional[pd.DataFrame] = None) -> List[Dict[str, Any]]:
         """Détecte les alertes basées sur des seuils"""
         alerts = []
         
@@ -187,45 +285,34 @@ class CovidETL:
             'rapid_increase': 50  # % d'augmentation sur 7 jours
         }
         
-        latest_date = df['date'].max()
-        latest_data = df[df['date'] == latest_date]
+        if latest_data is None:
+            latest_data = select_latest_rows(df)
+        if latest_data.empty:
+            return alerts
+        latest_date = latest_data['date'].iat[0]
         
-        for _, row in latest_data.iterrows():
-            country = row['iso_code']
-            
-            # Alerte incidence élevée
-            incidence = row.get('incidence_rate_100k', 0)
-            if pd.notna(incidence):
-                if incidence > THRESHOLDS['very_high_incidence']:
-                    alerts.append({
-                        'country_code': country,
-                        'alert_type': 'very_high_incidence',
-                        'alert_date': latest_date.date(),
-                        'metric_value': incidence,
-                        'threshold_value': THRESHOLDS['very_high_incidence'],
-                        'severity': 'high'
-                    })
-                elif incidence > THRESHOLDS['high_incidence']:
-                    alerts.append({
-                        'country_code': country,
-                        'alert_type': 'high_incidence',
-                        'alert_date': latest_date.date(),
-                        'metric_value': incidence,
-                        'threshold_value': THRESHOLDS['high_incidence'],
-                        'severity': 'medium'
-                    })
-            
-            # Alerte CFR élevé
-            cfr = row.get('case_fatality_rate', 0)
-            if pd.notna(cfr) and cfr > THRESHOLDS['high_cfr']:
-                alerts.append({
-                    'country_code': country,
-                    'alert_type': 'high_cfr',
-                    'alert_date': latest_date.date(),
-                    'metric_value': cfr,
-                    'threshold_value': THRESHOLDS['high_cfr'],
-                    'severity': 'medium'
-                })
+        # Masques booléens (les comparaisons avec NaN donnent False)
+        incidence = latest_data['incidence_rate_100k']
+        very_high_mask = incidence > THRESHOLDS['very_high_incidence']
+        high_mask = (incidence > THRESHOLDS['high_incidence']) & ~very_high_mask
+        cfr_mask = latest_data['case_fatality_rate'] > THRESHOLDS['high_cfr']
+        
+        rules = [
+            ('very_high_incidence', very_high_mask, 'incidence_rate_100k', 'high'),
+            ('high_incidence', high_mask, 'incidence_rate_100k', 'medium'),
+            ('high_cfr', cfr_mask, 'case_fatality_rate', 'medium'),
+        ]
+        
+        for alert_type, mask, metric, severity in rules:
+            triggered = latest_data.loc[mask, ['iso_code', metric]].rename(
+                columns={'iso_code': 'country_code', metric: 'metric_value'}
+            ).assign(
+                alert_type=alert_type,
+                alert_date=latest_date.date(),
+                threshold_value=THRESHOLDS[alert_type],
+                severity=severity
+            )
+            alerts.extend(triggered.to_dict('records'))
         
         return alerts
     
@@ -233,62 +320,64 @@ class CovidETL:
         """Charge les données dans PostgreSQL avec upsert"""
         logger.info(f"Début du chargement de {len(df)} lignes vers PostgreSQL")
         
-        # Calcul du score de qualité
-        df['data_quality_score'] = df.apply(self.calculate_data_quality_score, axis=1)
+        # Score de qualité : pré-calculé par la transformation, calculé ici seulement pour les lignes sans score
+        if 'data_quality_score' not in df.columns:
+            df['data_quality_score'] = self.calculate_data_quality_score(df)
+        else:
+            missing_score = df['data_quality_score'].isna()
+            if missing_score.any():
+                df.loc[missing_score, 'data_quality_score'] = self.calculate_data_quality_score(df[missing_score])
         df['last_updated'] = datetime.utcnow()
         
         stats = {'inserted': 0, 'updated': 0, 'errors': 0}
         
         with self.get_session() as session:
             try:
-                # Préparation des données pour l'insertion
-                records = []
-                for _, row in df.iterrows():
-                    record = {
-                        'iso_code': row['iso_code'],
-                        'location': row['location'],
-                        'date': row['date'].date(),
-                        'population': float(row['population']) if pd.notna(row['population']) else None,
-                        'total_cases': float(row['total_cases']) if pd.notna(row['total_cases']) else None,
-                        'new_cases': float(row['new_cases']) if pd.notna(row['new_cases']) else None,
-                        'total_deaths': float(row['total_deaths']) if pd.notna(row['total_deaths']) else None,
-                        'new_deaths': float(row['new_deaths']) if pd.notna(row['new_deaths']) else None,
-                        'total_vaccinations': float(row.get('total_vaccinations')) if pd.notna(row.get('total_vaccinations')) else None,
-                        'people_vaccinated': float(row.get('people_vaccinated')) if pd.notna(row.get('people_vaccinated')) else None,
-                        'people_fully_vaccinated': float(row.get('people_fully_vaccinated')) if pd.notna(row.get('people_fully_vaccinated')) else None,
-                        'new_vaccinations': float(row.get('new_vaccinations')) if pd.notna(row.get('new_vaccinations')) else None,
-                        'stringency_index': float(row.get('stringency_index')) if pd.notna(row.get('stringency_index')) else None,
-                        'incidence_rate_100k': float(row.get('incidence_rate_100k')) if pd.notna(row.get('incidence_rate_100k')) else None,
-                        'death_rate_100k': float(row.get('death_rate_100k')) if pd.notna(row.get('death_rate_100k')) else None,
-                        'case_fatality_rate': float(row.get('case_fatality_rate')) if pd.notna(row.get('case_fatality_rate')) else None,
-                        'vaccination_rate': float(row.get('vaccination_rate')) if pd.notna(row.get('vaccination_rate')) else None,
-                        'new_cases_7day_avg': float(row.get('new_cases_7day_avg')) if pd.notna(row.get('new_cases_7day_avg')) else None,
-                        'new_deaths_7day_avg': float(row.get('new_deaths_7day_avg')) if pd.notna(row.get('new_deaths_7day_avg')) else None,
-                        'incidence_rate_100k_7day_avg': float(row.get('incidence_rate_100k_7day_avg')) if pd.notna(row.get('incidence_rate_100k_7day_avg')) else None,
-                        'data_quality_score': float(row['data_quality_score']),
-                        'last_updated': row['last_updated']
-                    }
-                    records.append(record)
+                # Conversion colonnaire en table Arrow puis CSV pour COPY (null -> champ vide non quoté)
+                arrow_table = pa.Table.from_pandas(df.reindex(columns=COVID_RECORD_COLUMNS), preserve_index=False)
                 
-                # Insertion par batch avec upsert PostgreSQL
-                from sqlalchemy.dialects.postgresql import insert
-                
-                # Référence à la table
-                metadata = MetaData()
-                covid_table = Table('covid_daily_data', metadata, autoload_with=self.engine)
+                # Catégories décodées en chaînes et date tronquée en date32 pour le CSV
+                for name, arrow_type in [('iso_code', pa.string()), ('location', pa.string()), ('date', pa.date32())]:
+                    index = arrow_table.schema.get_field_index(name)
+                    arrow_table = arrow_table.set_column(
+                        index, name, pc.cast(arrow_table[name], arrow_type, safe=False)
+                    )
+                write_options = pacsv.WriteOptions(include_header=False)
                 
-                # Upsert en utilisant ON CONFLICT
-                stmt = insert(covid_table).values(records)
-                upsert_stmt = stmt.on_conflict_do_update(
-                    constraint='uq_covid_country_date',
-                    set_={
-                        col.name: stmt.excluded[col.name] 
-                        for col in covid_table.columns 
-                        if col.name not in ['id', 'iso_code', 'date', 'created_at']
-                    }
+                columns = ', '.join(COVID_RECORD_COLUMNS)
+                update_set = ', '.join(
+                    f"{col} = EXCLUDED.{col}"
+                    for col in COVID_RECORD_COLUMNS
+                    if col not in ('iso_code', 'date')
                 )
                 
-                result = session.execute(upsert_stmt)
+                # Table de staging temporaire (supprimée au commit)
+                session.execute(sa.text(
+                    "CREATE TEMP TABLE stg_covid (LIKE covid_daily_data INCLUDING DEFAULTS) ON COMMIT DROP"
+                ))
+                
+                # Chargement en masse via COPY sur la connexion de la session,
+                # par lots pour borner la taille du buffer CSV en mémoire
+                cursor = session.connection().connection.cursor()
+                try:
+                    for batch in arrow_table.to_batches(max_chunksize=COPY_CHUNK_SIZE):
+                        buffer = io.BytesIO()
+                        pacsv.write_csv(batch, buffer, write_options=write_options)
+                        buffer.seek(0)
+                        cursor.copy_expert(
+                            f"COPY stg_covid ({columns}) FROM STDIN WITH (FORMAT csv)",
+                            buffer
+                        )
+                finally:
+                    cursor.close()
+                
+                # Upsert côté serveur depuis la table de staging
+                result = session.execute(sa.text(f"""
+                    INSERT INTO covid_daily_data ({columns}, created_at)
+                    SELECT {columns}, last_updated FROM stg_covid
+                    ON CONFLICT ON CONSTRAINT uq_covid_country_date
+                    DO UPDATE SET {update_set}
+                """))
                 stats['inserted'] = result.rowcount
                 
                 logger.info(f"✅ {stats['inserted']} lignes traitées en PostgreSQL")
@@ -300,14 +389,19 @@ class CovidETL:
         
         return stats
     
-    def create_daily_summary(self, df: pd.DataFrame):
+    def create_daily_summary(self, df: pd.DataFrame, latest: Optional[pd.DataFrame] = None):
         """Crée un résumé quotidien pour les performances"""
         try:
-            latest_date = df['date'].max().date()
+            # Lignes de la date la plus récente, filtrées une seule fois
+            if latest is None:
+                latest = select_latest_rows(df)
+            if latest.empty:
+                logger.warning("Pas de données pour le résumé")
+                return
+            latest_date = latest['date'].iat[0].date()
             
             # Calculs d'agrégation
-            world_data = df[df['iso_code'] == 'OWID_WRL']
-            latest_world = world_data[world_data['date'] == df['date'].max()]
+            latest_world = latest[latest['iso_code'] == 'OWID_WRL']
             
             if len(latest_world) == 0:
                 logger.warning("Pas de données mondiales pour le résumé")
@@ -317,17 +411,11 @@ class CovidETL:
             
             # Métriques globales
             countries_count = df['iso_code'].nunique()
-            high_incidence_countries = len(df[
-                (df['date'] == df['date'].max()) & 
-                (df['incidence_rate_100k'] > 100)
-            ])
-            
-            avg_vaccination = df[
-                (df['date'] == df['date'].max()) & 
-                (df['vaccination_rate'].notna())
-            ]['vaccination_rate'].mean()
+            high_incidence_countries = int((latest['incidence_rate_100k'] > 100).sum())
+            avg_vaccination = latest['vaccination_rate'].mean()
             
-            data_completeness = (df.notna().sum() / len(df)).mean() * 100
+            # count() ignore déjà les NaN : pas de matrice booléenne intermédiaire
+            data_completeness = df.count().sum() / (len(df) * df.shape[1]) * 100
             
             summary = {
                 'summary_date': latest_date,
@@ -343,8 +431,7 @@ class CovidETL:
             
             with self.get_session() as session:
                 # Upsert du résumé quotidien
-                metadata = MetaData()
-                summary_table = Table('covid_daily_summary', metadata, autoload_with=self.engine)
+                summary_table = self.summary_table
                 
                 stmt = insert(summary_table).values([summary])
                 upsert_stmt = stmt.on_conflict_do_update(
@@ -366,61 +453,94 @@ class CovidETL:
         
         try:
             with self.get_session() as session:
-                metadata = MetaData()
-                alerts_table = Table('covid_alerts', metadata, autoload_with=self.engine)
+                alerts_table = self.alerts_table
                 
-                # Désactiver les anciennes alertes du même type
-                for alert in alerts:
-                    session.execute(
-                        alerts_table.update()
-                        .where(
-                            (alerts_table.c.country_code == alert['country_code']) &
-                            (alerts_table.c.alert_type == alert['alert_type']) &
-                            (alerts_table.c.is_active == True)
-                        )
-                        .values(is_active=False, resolved_at=datetime.utcnow())
+                # Désactiver les anciennes alertes du même type en une seule requête
+                pairs = list({(alert['country_code'], alert['alert_type']) for alert in alerts})
+                session.execute(
+                    alerts_table.update()
+                    .where(
+                        sa.tuple_(alerts_table.c.country_code, alerts_table.c.alert_type).in_(pairs) &
+                        (alerts_table.c.is_active == True)
                     )
+                    .values(is_active=False, resolved_at=datetime.utcnow())
+                )
                 
-                # Insérer les nouvelles alertes
-                session.execute(alerts_table.insert().values(alerts))
+                # Insérer les nouvelles alertes (executemany groupé)
+                session.execute(alerts_table.insert(), alerts)
                 logger.info(f"✅ {len(alerts)} alertes sauvegardées")
         
         except Exception as e:
             logger.error(f"❌ Erreur lors de la sauvegarde des alertes: {e}")
     
-    def update_cache(self, df: pd.DataFrame):
+    def build_summary_stats(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Pré-calcule les statistiques résumées par pays servies par l'API (/summary)"""
+        df_sorted = df.sort_values(['iso_code', 'date'])
+        grouped = df_sorted.groupby('iso_code', sort=False, observed=True)
+        latest_rows = grouped.tail(1)
+        
+        trends = {}
+        if 'new_cases' in df.columns:
+            last_14 = grouped.tail(14)
+            trends = calculate_trends(last_14).to_dict()
+        
+        summaries = []
+        for latest in latest_rows.to_dict('records'):
+            summaries.append({
+                'country': latest['location'],
+                'total_cases': int(latest['total_cases']) if pd.notna(latest.get('total_cases')) else None,
+                'total_deaths': int(latest['total_deaths']) if pd.notna(latest.get('total_deaths')) else None,
+                'current_incidence': round(latest['incidence_rate_100k'], 2) if pd.notna(latest.get('incidence_rate_100k')) else None,
+                'trend_7d': trends.get(latest['iso_code'], "no_data"),
+                'vaccination_rate': round(latest['vaccination_rate'], 1) if pd.notna(latest.get('vaccination_rate')) else None
+            })
+        
+        return summaries
+    
+    def update_cache(self, df: pd.DataFrame, latest_data: Optional[pd.DataFrame] = None):
         """Met à jour le cache Redis si disponible"""
         if not self.redis_client:
             return
         
         try:
             # Cache des métriques principales
-            latest_date = df['date'].max()
-            latest_data = df[df['date'] == latest_date]
+            if latest_data is None:
+                latest_data = select_latest_rows(df)
+            
+            # Toutes les écritures passent par un pipeline (un seul aller-retour)
+            pipe = self.redis_client.pipeline(transaction=False)
             
             # Cache des données par pays
-            for _, row in latest_data.iterrows():
-                country_key = f"country:{row['iso_code']}:latest"
+            cache_data = latest_data.reindex(columns=['iso_code', 'location', 'date', 'total_cases', 'new_cases', 'incidence_rate_100k'])
+            for row in cache_data.itertuples(index=False):
+                country_key = f"country:{row.iso_code}:latest"
                 country_data = {
-                    'location': row['location'],
-                    'date': str(row['date'].date()),
-                    'total_cases': float(row['total_cases']) if pd.notna(row['total_cases']) else None,
-                    'new_cases': float(row['new_cases']) if pd.notna(row['new_cases']) else None,
-                    'incidence_rate': float(row.get('incidence_rate_100k')) if pd.notna(row.get('incidence_rate_100k')) else None,
+                    'location': row.location,
+                    'date': str(row.date.date()),
+                    'total_cases': float(row.total_cases) if pd.notna(row.total_cases) else None,
+                    'new_cases': float(row.new_cases) if pd.notna(row.new_cases) else None,
+                    'incidence_rate': float(row.incidence_rate_100k) if pd.notna(row.incidence_rate_100k) else None,
                 }
                 
-                self.redis_client.setex(
+                pipe.setex(
                     country_key, 
                     3600,  # TTL: 1 heure
-                    json.dumps(country_data, default=str)
+                    orjson.dumps(country_data, option=orjson.OPT_SERIALIZE_NUMPY)
                 )
             
             # Cache de la liste des pays
             countries = df[['iso_code', 'location']].drop_duplicates().to_dict('records')
-            self.redis_client.setex('countries:list', 3600, json.dumps(countries))
+            pipe.setex('countries:list', 3600, orjson.dumps(countries))
+            
+            # Agrégats pré-calculés lus directement par l'API (/countries, /summary)
+            countries_sorted = df[['iso_code', 'location']].drop_duplicates().sort_values('location')
+            pipe.setex('countries:list_v2', 3600, orjson.dumps(countries_sorted.to_dict('records')))
+            pipe.setex('summary:v1', 3600, orjson.dumps(self.build_summary_stats(df), option=orjson.OPT_SERIALIZE_NUMPY))
             
             # Timestamp de dernière mise à jour
-            self.redis_client.setex('data:last_update', 3600, str(datetime.utcnow()))
+            pipe.setex('data:last_update', 3600, str(datetime.utcnow()))
+            
+            pipe.execute()
             
             logger.info("✅ Cache Redis mis à jour")
         
@@ -445,8 +565,11 @@ class CovidETL:
                 raise FileNotFoundError(f"Fichier de données non trouvé: {LATEST_DATA_FILE}")
             
             logger.info(f"Chargement depuis: {LATEST_DATA_FILE}")
-            df = pd.read_parquet(LATEST_DATA_FILE)
-            df['date'] = pd.to_datetime(df['date'])
+            df = read_processed_parquet(LATEST_DATA_FILE, PARQUET_COLUMNS)
+            
+            # Tri unique par date : la dernière date devient une borne (searchsorted)
+            df = df.sort_values('date', kind='stable', ignore_index=True)
+            latest_df = select_latest_rows(df)
             
             logger.info(f"Données chargées: {len(df)} lignes, {len(df.columns)} colonnes")
             
@@ -455,16 +578,20 @@ class CovidETL:
             results['stats']['database'] = db_stats
             
             # 3. Détection des alertes
-            alerts = self.detect_alerts(df)
+            alerts = self.detect_alerts(df, latest_df)
             if alerts:
-                self.save_alerts(alerts)
                 results['stats']['alerts'] = len(alerts)
             
-            # 4. Création du résumé quotidien
-            self.create_daily_summary(df)
-            
-            # 5. Mise à jour du cache
-            self.update_cache(df)
+            # 4-5. Sauvegarde des alertes, résumé quotidien et cache Redis : étapes I/O
+            # indépendantes (lecture seule de df), exécutées en parallèle
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [
+                    executor.submit(self.save_alerts, alerts),
+                    executor.submit(self.create_daily_summary, df, latest_df),
+                    executor.submit(self.update_cache, df, latest_df)
+                ]
+                for future in futures:
+                    future.result()
             
             # 6. Statistiques finales
             end_time = datetime.utcnow()
@@ -478,7 +605,7 @@ class CovidETL:
                     **results['stats'],
                     'rows_processed': len(df),
                     'countries': df['iso_code'].nunique(),
-                    'date_range': f"{df['date'].min().date()} to {df['date'].max().date()}"
+                    'date_range': f"{df['date'].iat[0].date()} to {df['date'].iat[-1].date()}" if len(df) else None
                 }
             })
             
@@ -6,13 +6,18 @@ Expose les données traitées via des APIs REST optimisées pour Grafana
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pydantic import BaseModel
 import logging
+import orjson
+import redis
 from functools import lru_cache
 
 # Configuration
@@ -21,7 +26,8 @@ app = FastAPI(
     description="API pour les données de surveillance épidémiologique",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configuration CORS pour Grafana
@@ -36,11 +42,53 @@ app.add_middleware(
 # Configuration des chemins
 DATA_DIR = Path("data/processed")
 LATEST_DATA_FILE = DATA_DIR / "latest_covid_processed.parquet"
+REDIS_URL = "redis://redis:6379/0"
+
+# Métriques exposées par l'API
+METRICS = [
+    "new_cases",
+    "total_cases",
+    "new_deaths",
+    "total_deaths",
+    "incidence_rate_100k",
+    "incidence_rate_100k_7day_avg",
+    "case_fatality_rate",
+    "vaccination_rate"
+]
+
+# Index des DataFrames servis (toutes les colonnes du Parquet traité sont chargées dans la table Arrow)
+INDEX_COLUMNS = ['iso_code', 'date']
+ALERT_FLAG_COLUMNS = ['is_high_incidence', 'is_high_cfr']  # pré-calculés par la transformation
+
+# Projections converties en pandas par endpoint (le reste de la table Arrow n'est pas touché)
+SUMMARY_COLUMNS = ['location', 'new_cases', 'total_cases', 'total_deaths', 'incidence_rate_100k', 'vaccination_rate']
+ALERT_COLUMNS = ['location', 'incidence_rate_100k', 'case_fatality_rate'] + ALERT_FLAG_COLUMNS
+COUNTRY_COLUMNS = ['location', 'new_cases', 'total_cases', 'new_deaths', 'total_deaths',
+                   'incidence_rate_100k', 'case_fatality_rate', 'vaccination_rate']
+
+# Colonnes à faible cardinalité chargées en Categorical (dictionnaire Parquet)
+CATEGORICAL_COLUMNS = ['iso_code', 'location']
+
+# Autres chaînes en mémoire Arrow plutôt qu'en objets Python
+ARROW_TYPES_MAPPING = {
+    pa.string(): pd.ArrowDtype(pa.string()),
+    pa.large_string(): pd.ArrowDtype(pa.large_string())
+}
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cache Redis optionnel (agrégats pré-calculés par l'ETL)
+# Client toujours construit : redis-py se reconnecte à chaque commande, un Redis encore en démarrage
+# est donc utilisé dès qu'il répond (get_cached_json retombe sinon sur les DataFrames)
+redis_client = redis.from_url(REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+try:
+    redis_client.ping()
+    logger.info("✅ Connexion Redis établie")
+except Exception as e:
+    logger.warning(f"Redis non disponible pour l'instant: {e}")
+
 # =============================================================================
 # MODÈLES PYDANTIC
 # =============================================================================
@@ -87,45 +135,132 @@ class SummaryStats(BaseModel):
 # CACHE ET HELPERS
 # =============================================================================
 
+def read_processed_table(path: Path, columns: List[str]) -> pa.Table:
+    """Lit le Parquet traité en table Arrow (mmap, projection de colonnes, dictionnaires pour les catégories)"""
+    available_columns = pq.read_schema(path).names
+    return pq.read_table(
+        path,
+        columns=[col for col in columns if col in available_columns],
+        read_dictionary=CATEGORICAL_COLUMNS,
+        memory_map=True,
+        pre_buffer=True,
+        use_threads=True
+    )
+
+def table_to_frame(table: pa.Table) -> pd.DataFrame:
+    """Convertit une projection Arrow en DataFrame indexé par (iso_code, date), trié"""
+    # ignore_metadata : les entiers nullables (Int32/Int64) reviennent en float64 NaN, non en pd.NA
+    df = table.to_pandas(split_blocks=True, ignore_metadata=True, types_mapper=ARROW_TYPES_MAPPING.get)
+    
+    # Catégories triées pour que les tris (ex. par location) restent alphabétiques
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    
+    df['date'] = pd.to_datetime(df['date'])
+    return df.set_index(INDEX_COLUMNS).sort_index()
+
 @lru_cache(maxsize=1)
-def load_latest_data() -> pd.DataFrame:
-    """Charge les dernières données avec cache"""
+def _load_table_version(mtime_ns: int) -> pa.Table:
+    """Charge une version du fichier Parquet en table Arrow, identifiée par son mtime (ns)"""
+    # Nouvelle version : les projections pandas de l'ancienne sont libérées
+    _load_frame_version.cache_clear()
+    # Colonnes issues du schéma du fichier : toute colonne écrite par la transformation reste servie
+    table = read_processed_table(LATEST_DATA_FILE, pq.read_schema(LATEST_DATA_FILE).names)
+    logger.info(f"Données chargées: {table.num_rows} lignes, {len(table.column_names)} colonnes")
+    return table
+
+@lru_cache(maxsize=16)
+def _load_frame_version(mtime_ns: int, columns: Optional[tuple]) -> pd.DataFrame:
+    """Projection pandas d'une version de la table (seules les colonnes demandées sont converties)
+
+    columns=None : toutes les colonnes de la table.
+    Le DataFrame retourné est partagé entre les requêtes : les endpoints ne le modifient pas.
+    """
+    table = _load_table_version(mtime_ns)
+    if columns is None:
+        columns = [col for col in table.column_names if col not in INDEX_COLUMNS]
+    selected = INDEX_COLUMNS + [col for col in columns if col in table.column_names]
+    return table_to_frame(table.select(selected))
+
+def load_latest_data(columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Charge les dernières données avec cache (rechargées si le fichier change)
+
+    columns : colonnes à convertir en plus de l'index (iso_code, date) ; toutes par défaut.
+    """
     try:
         if not LATEST_DATA_FILE.exists():
             raise HTTPException(status_code=503, detail="Données non disponibles")
         
-        df = pd.read_parquet(LATEST_DATA_FILE)
-        df['date'] = pd.to_datetime(df['date'])
-        logger.info(f"Données chargées: {len(df)} lignes, {df['date'].max()}")
-        return df
+        columns = None if columns is None else tuple(columns)
+        return _load_frame_version(LATEST_DATA_FILE.stat().st_mtime_ns, columns)
     
     except Exception as e:
         logger.error(f"Erreur lors du chargement des données: {e}")
         raise HTTPException(status_code=503, detail=f"Erreur de chargement: {str(e)}")
 
-def calculate_trend(values: pd.Series) -> str:
-    """Calcule la tendance sur une série de valeurs"""
-    if len(values) < 7:
-        return "insufficient_data"
+def get_available_columns() -> List[str]:
+    """Colonnes de données de la dernière version de la table Arrow (hors index), sans conversion pandas"""
+    try:
+        if not LATEST_DATA_FILE.exists():
+            raise HTTPException(status_code=503, detail="Données non disponibles")
+        
+        table = _load_table_version(LATEST_DATA_FILE.stat().st_mtime_ns)
+        return [col for col in table.column_names if col not in INDEX_COLUMNS]
     
-    recent = values.tail(7).mean()
-    previous = values.iloc[-14:-7].mean() if len(values) >= 14 else values.head(7).mean()
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement des données: {e}")
+        raise HTTPException(status_code=503, detail=f"Erreur de chargement: {str(e)}")
+
+def get_country_frame(df: pd.DataFrame, country: str, start=None, end=None,
+                      columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Lignes d'un pays entre start et end (index date trié) ; vide si pays inconnu
+
+    Un seul .loc sur l'index (iso_code, date) trié : recherche binaire sur les deux niveaux,
+    seules les lignes retenues sont copiées.
+    """
+    columns = slice(None) if columns is None else columns
+    try:
+        return df.loc[(country, slice(start, end)), columns].droplevel('iso_code')
+    except KeyError:
+        return df.iloc[0:0].loc[:, columns].droplevel('iso_code')
+
+def get_cached_json(key: str) -> Optional[Any]:
+    """Lit un agrégat JSON pré-calculé dans Redis (None si absent ou indisponible)"""
+    try:
+        payload = redis_client.get(key)
+        return orjson.loads(payload) if payload is not None else None
+    except Exception as e:
+        logger.warning(f"Lecture cache Redis impossible ({key}): {e}")
+        return None
+
+def calculate_trends(last_14: pd.DataFrame, column: str = 'new_cases') -> pd.Series:
+    """Calcule la tendance 7 jours par pays en une passe sur les 14 dernières lignes"""
+    grouped = last_14.groupby('iso_code', sort=False, observed=True)[column]
+    rolling_7 = grouped.rolling(7, min_periods=1).mean().droplevel(0).reindex(last_14.index).to_numpy()
+    position = grouped.cumcount().to_numpy()
+    size = grouped.transform('size').to_numpy()
+    countries = last_14['iso_code'].to_numpy()
     
-    if pd.isna(recent) or pd.isna(previous):
-        return "no_data"
+    # Moyenne des 7 derniers jours (dernière ligne) et des 7 précédents (7e ligne de la fenêtre)
+    is_last = position == size - 1
+    is_previous = position == 6
+    recent = rolling_7[is_last]
+    previous = pd.Series(rolling_7[is_previous], index=countries[is_previous]).reindex(countries[is_last]).to_numpy()
     
-    change = (recent - previous) / previous if previous > 0 else 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(previous > 0, (recent - previous) / previous, 0)
     
-    if change > 0.1:
-        return "increasing"
-    elif change < -0.1:
-        return "decreasing"
-    else:
-        return "stable"
+    trend = np.select(
+        [size[is_last] < 7, np.isnan(recent) | np.isnan(previous), change > 0.1, change < -0.1],
+        ['insufficient_data', 'no_data', 'increasing', 'decreasing'],
+        default='stable'
+    )
+    return pd.Series(trend, index=countries[is_last])
 
-def to_grafana_timestamp(dt: pd.Timestamp) -> int:
-    """Convertit un timestamp pandas en timestamp Grafana (millisecondes)"""
-    return int(dt.timestamp() * 1000)
+def to_grafana_timestamps(dates: pd.DatetimeIndex) -> np.ndarray:
+    """Convertit des dates en timestamps Grafana (ms epoch, int64) en une seule opération, quelle que soit l'unité"""
+    return dates.to_numpy().astype('datetime64[ms]').view(np.int64)
 
 # =============================================================================
 # ENDPOINTS PRINCIPAUX
@@ -135,8 +270,8 @@ def to_grafana_timestamp(dt: pd.Timestamp) -> int:
 async def health_check():
     """Health check avec informations sur la fraîcheur des données"""
     try:
-        df = load_latest_data()
-        latest_date = df['date'].max()
+        df = load_latest_data([])
+        latest_date = df.index.get_level_values('date').max()
         days_old = (datetime.now().date() - latest_date.date()).days
         
         return HealthCheck(
@@ -155,9 +290,13 @@ async def health_check():
 async def get_countries():
     """Liste des pays disponibles"""
     try:
-        df = load_latest_data()
-        countries = df[['iso_code', 'location']].drop_duplicates().sort_values('location')
-        return countries.to_dict('records')
+        cached = get_cached_json('countries:list_v2')
+        if cached is not None:
+            return cached
+        
+        df = load_latest_data(['location'])
+        countries = df['location'].groupby(level='iso_code', observed=True).first().reset_index()
+        return countries.sort_values('location').to_dict('records')
     except Exception as e:
         logger.error(f"Erreur get_countries: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -166,25 +305,35 @@ async def get_countries():
 async def get_summary_stats():
     """Statistiques résumées pour tous les pays"""
     try:
-        df = load_latest_data()
+        cached = get_cached_json('summary:v1')
+        if cached is not None:
+            return cached
+        
+        df = load_latest_data(SUMMARY_COLUMNS)
+        
+        # Index (iso_code, date) déjà trié : extraction groupée des dernières lignes par pays
+        grouped = df.groupby(level='iso_code', sort=False, observed=True)
+        latest_rows = grouped.tail(1).reset_index()
+        
+        # 14 derniers jours par pays : suffisant pour le calcul de tendance
+        trends = {}
+        if 'new_cases' in df.columns:
+            last_14 = grouped.tail(14).reset_index()
+            trends = calculate_trends(last_14).to_dict()
         
         summaries = []
-        for country in df['iso_code'].unique():
-            country_data = df[df['iso_code'] == country].sort_values('date')
-            latest = country_data.iloc[-1] if len(country_data) > 0 else None
+        for latest in latest_rows.to_dict('records'):
+            trend = trends.get(latest['iso_code'], "no_data")
             
-            if latest is not None:
-                trend = calculate_trend(country_data['new_cases']) if 'new_cases' in country_data.columns else "no_data"
-                
-                summary = SummaryStats(
-                    country=latest['location'],
-                    total_cases=int(latest.get('total_cases', 0)) if pd.notna(latest.get('total_cases')) else None,
-                    total_deaths=int(latest.get('total_deaths', 0)) if pd.notna(latest.get('total_deaths')) else None,
-                    current_incidence=round(latest.get('incidence_rate_100k', 0), 2) if pd.notna(latest.get('incidence_rate_100k')) else None,
-                    trend_7d=trend,
-                    vaccination_rate=round(latest.get('vaccination_rate', 0), 1) if pd.notna(latest.get('vaccination_rate')) else None
-                )
-                summaries.append(summary)
+            summary = SummaryStats(
+                country=latest['location'],
+                total_cases=int(latest.get('total_cases', 0)) if pd.notna(latest.get('total_cases')) else None,
+                total_deaths=int(latest.get('total_deaths', 0)) if pd.notna(latest.get('total_deaths')) else None,
+                current_incidence=round(latest.get('incidence_rate_100k', 0), 2) if pd.notna(latest.get('incidence_rate_100k')) else None,
+                trend_7d=trend,
+                vaccination_rate=round(latest.get('vaccination_rate', 0), 1) if pd.notna(latest.get('vaccination_rate')) else None
+            )
+            summaries.append(summary)
         
         return summaries
     except Exception as e:
@@ -198,32 +347,21 @@ async def get_summary_stats():
 @app.post("/grafana/search")
 async def grafana_search():
     """Endpoint pour la découverte des métriques dans Grafana"""
-    metrics = [
-        "new_cases",
-        "total_cases", 
-        "new_deaths",
-        "total_deaths",
-        "incidence_rate_100k",
-        "incidence_rate_100k_7day_avg",
-        "case_fatality_rate",
-        "vaccination_rate"
-    ]
-    return metrics
+    return METRICS
 
 @app.post("/grafana/query")
 async def grafana_query(request: dict):
     """Endpoint principal pour les requêtes Grafana"""
     try:
-        df = load_latest_data()
         targets = request.get('targets', [])
         range_from = request.get('range', {}).get('from')
         range_to = request.get('range', {}).get('to')
         
-        # Filtrage temporel si spécifié
+        # Bornes temporelles si spécifiées (Grafana envoie de l'ISO UTC, les dates sont naïves)
+        start_date = end_date = None
         if range_from and range_to:
-            start_date = pd.to_datetime(range_from)
-            end_date = pd.to_datetime(range_to)
-            df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
+            start_date = pd.to_datetime(range_from, utc=True).tz_localize(None)
+            end_date = pd.to_datetime(range_to, utc=True).tz_localize(None)
         
         results = []
         
@@ -233,28 +371,34 @@ async def grafana_query(request: dict):
             # Parse du format "metric:country" ou juste "metric"
             if ':' in target_str:
                 metric, country = target_str.split(':', 1)
-                country_filter = df['iso_code'] == country
             else:
                 metric = target_str
-                country_filter = df['iso_code'] == 'OWID_WRL'  # Données mondiales par défaut
+                country = 'OWID_WRL'  # Données mondiales par défaut
             
-            if metric in df.columns:
-                filtered_df = df[country_filter].sort_values('date')
+            # Seule la colonne de la métrique est convertie depuis la table Arrow (si elle existe)
+            df = load_latest_data([metric]) if metric in get_available_columns() else None
+            
+            if df is not None and metric in df.columns:
+                # Sélection par l'index (iso_code, date) : recherche binaire au lieu d'un masque complet
+                filtered_df = get_country_frame(df, country, start_date, end_date, [metric])
                 
-                # Préparation des datapoints pour Grafana
-                datapoints = []
-                for _, row in filtered_df.iterrows():
-                    value = row[metric]
-                    if pd.notna(value):
-                        timestamp = to_grafana_timestamp(row['date'])
-                        datapoints.append([float(value), timestamp])
+                # Préparation des datapoints pour Grafana (vectorisée, NaN exclus)
+                values = filtered_df[metric].to_numpy(dtype=np.float64)
+                timestamps = to_grafana_timestamps(filtered_df.index)
+                valid = ~np.isnan(values)
+                # Paires [valeur, timestamp] : timestamps gardés en entiers (un tableau (n, 2) les passerait en float)
+                datapoints = [
+                    [value, ts]
+                    for value, ts in zip(values[valid].tolist(), timestamps[valid].tolist())
+                ]
                 
                 results.append({
                     'target': target_str,
                     'datapoints': datapoints
                 })
         
-        return results
+        # Réponse directe : pas de passage par jsonable_encoder sur les datapoints
+        return ORJSONResponse(results)
     
     except Exception as e:
         logger.error(f"Erreur grafana_query: {e}")
@@ -268,37 +412,37 @@ async def get_timeseries(
 ):
     """Endpoint pour récupérer des séries temporelles"""
     try:
-        df = load_latest_data()
-        
-        # Filtrage temporel
-        cutoff_date = datetime.now() - timedelta(days=days_back)
-        df = df[df['date'] >= cutoff_date]
-        
-        # Vérification de l'existence de la métrique
-        if metric not in df.columns:
-            available_metrics = [col for col in df.columns if col not in ['iso_code', 'location', 'date']]
+        # Vérification de l'existence de la métrique dans la table Arrow
+        available_columns = get_available_columns()
+        if metric not in available_columns:
+            available_metrics = [col for col in available_columns if col != 'location']
             raise HTTPException(
                 status_code=400, 
                 detail=f"Métrique '{metric}' non disponible. Métriques disponibles: {available_metrics}"
             )
         
+        df = load_latest_data([metric])
+        
+        # Borne temporelle
+        cutoff_date = datetime.now() - timedelta(days=days_back)
+        
         results = {}
         for country in countries:
-            country_data = df[df['iso_code'] == country].sort_values('date')
+            country_data = get_country_frame(df, country, cutoff_date, columns=[metric])
             
             if len(country_data) > 0:
-                timeseries = []
-                for _, row in country_data.iterrows():
-                    if pd.notna(row[metric]):
-                        timeseries.append({
-                            'timestamp': to_grafana_timestamp(row['date']),
-                            'value': float(row[metric])
-                        })
-                
-                results[country] = timeseries
+                values = country_data[metric].to_numpy(dtype=np.float64)
+                timestamps = to_grafana_timestamps(country_data.index)
+                valid = ~np.isnan(values)
+                results[country] = [
+                    {'timestamp': ts, 'value': value}
+                    for ts, value in zip(timestamps[valid].tolist(), values[valid].tolist())
+                ]
         
         return results
     
+    except HTTPException:
+        raise  # 400 / 503 transmis tels quels
     except Exception as e:
         logger.error(f"Erreur get_timeseries: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -317,37 +461,22 @@ async def get_country_data(
         df = load_latest_data()
         
         # Vérification de l'existence du pays
-        if country_code not in df['iso_code'].values:
-            available_countries = df['iso_code'].unique().tolist()
+        available_countries = df.index.unique(level='iso_code')
+        if country_code not in available_countries:
+            available_countries = available_countries.tolist()
             raise HTTPException(
                 status_code=404,
                 detail=f"Pays '{country_code}' non trouvé. Pays disponibles: {available_countries}"
             )
         
-        # Filtrage
+        # Filtrage (index date déjà trié) et projection sur les champs de CountryData
         cutoff_date = datetime.now() - timedelta(days=days_back)
-        country_data = df[
-            (df['iso_code'] == country_code) & 
-            (df['date'] >= cutoff_date)
-        ].sort_values('date')
-        
-        # Conversion en format API
-        results = []
-        for _, row in country_data.iterrows():
-            results.append(CountryData(
-                iso_code=row['iso_code'],
-                location=row['location'],
-                date=row['date'].date(),
-                new_cases=row.get('new_cases'),
-                total_cases=row.get('total_cases'),
-                new_deaths=row.get('new_deaths'),
-                total_deaths=row.get('total_deaths'),
-                incidence_rate_100k=row.get('incidence_rate_100k'),
-                case_fatality_rate=row.get('case_fatality_rate'),
-                vaccination_rate=row.get('vaccination_rate')
-            ))
+        columns = [col for col in COUNTRY_COLUMNS if col in df.columns]
+        country_data = get_country_frame(df, country_code, cutoff_date, columns=columns)
         
-        return results
+        # Conversion en format API (données internes de confiance : pas de validation par ligne)
+        records = country_data.assign(iso_code=country_code, date=country_data.index.date).to_dict('records')
+        return [CountryData.model_construct(**record) for record in records]
     
     except Exception as e:
         logger.error(f"Erreur get_country_data: {e}")
@@ -357,36 +486,40 @@ async def get_country_data(
 async def get_alerts():
     """Endpoint pour les alertes basées sur des seuils"""
     try:
-        df = load_latest_data()
+        df = load_latest_data(ALERT_COLUMNS)
         
         # Seuils d'alerte
         HIGH_INCIDENCE_THRESHOLD = 100  # cas pour 100k habitants
         HIGH_CFR_THRESHOLD = 5  # Case Fatality Rate en %
         
-        alerts = []
+        # Dernière ligne par pays (index (iso_code, date) déjà trié)
+        latest = df.groupby(level='iso_code', sort=False, observed=True).tail(1).reset_index()
+        latest['date'] = latest['date'].dt.strftime('%Y-%m-%dT%H:%M:%S')
         
-        for country in df['iso_code'].unique():
-            latest_data = df[df['iso_code'] == country].sort_values('date').iloc[-1]
-            
-            # Alerte incidence élevée
-            if pd.notna(latest_data.get('incidence_rate_100k')) and latest_data['incidence_rate_100k'] > HIGH_INCIDENCE_THRESHOLD:
-                alerts.append({
-                    'country': latest_data['location'],
-                    'type': 'high_incidence',
-                    'value': latest_data['incidence_rate_100k'],
-                    'threshold': HIGH_INCIDENCE_THRESHOLD,
-                    'date': latest_data['date'].isoformat()
-                })
-            
-            # Alerte CFR élevé
-            if pd.notna(latest_data.get('case_fatality_rate')) and latest_data['case_fatality_rate'] > HIGH_CFR_THRESHOLD:
-                alerts.append({
-                    'country': latest_data['location'],
-                    'type': 'high_cfr',
-                    'value': latest_data['case_fatality_rate'],
-                    'threshold': HIGH_CFR_THRESHOLD,
-                    'date': latest_data['date'].isoformat()
-                })
+        # Drapeaux pré-calculés par la transformation, sinon masques de seuil (NaN exclus)
+        alert_rules = [
+            ('incidence_rate_100k', 'is_high_incidence', 'high_incidence', HIGH_INCIDENCE_THRESHOLD),  # Alerte incidence élevée
+            ('case_fatality_rate', 'is_high_cfr', 'high_cfr', HIGH_CFR_THRESHOLD),  # Alerte CFR élevé
+        ]
+        
+        frames = []
+        for rank, (column, flag, alert_type, threshold) in enumerate(alert_rules):
+            if column not in latest.columns:
+                continue
+            mask = latest[flag] if flag in latest.columns else latest[column] > threshold
+            hits = latest.loc[mask]
+            frames.append(
+                hits.assign(country=hits['location'], type=alert_type, value=hits[column].astype(float),
+                            threshold=threshold, rank=rank)
+                [['iso_code', 'rank', 'country', 'type', 'value', 'threshold', 'date']]
+            )
+        
+        if not frames:
+            return []
+        
+        # Ordre d'origine : par pays, incidence puis CFR
+        alerts_df = pd.concat(frames).sort_values(['iso_code', 'rank'], kind='stable')
+        alerts = alerts_df.drop(columns=['iso_code', 'rank']).to_dict('records')
         
         return alerts
     
@@ -9,7 +9,10 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import pyarrow.parquet as pq
 
 # Configuration
@@ -37,6 +40,18 @@ CORE_COLUMNS = [
     'new_vaccinations', 'stringency_index'
 ]
 
+# Seuils d'alerte (drapeaux pré-calculés, relus par l'endpoint /alerts)
+HIGH_INCIDENCE_THRESHOLD = 100  # cas pour 100k habitants
+HIGH_CFR_THRESHOLD = 5  # Case Fatality Rate en %
+
+# Types réduits à l'écriture Parquet (entiers nullables pour préserver les NaN)
+# Les taux restent en float64 : un float32 relu exposerait du bruit d'arrondi (461.4 -> 461.3999938964844)
+PARQUET_DTYPES = {
+    'new_cases': 'Int32',
+    'new_deaths': 'Int32',
+    'total_cases': 'Int64'
+}
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -47,20 +62,43 @@ logger = logging.getLogger(__name__)
 def load_raw_data():
     """Charge les données brutes les plus récentes"""
     try:
-        # Cherche le fichier le plus récent ou utilise le lien symbolique
-        latest_file = RAW_DIR / "latest_owid_covid_data.csv"
+        # Cherche le fichier le plus récent ou utilise le lien symbolique (CSV brut ou compressé gzip)
+        latest_links = [RAW_DIR / "latest_owid_covid_data.csv", RAW_DIR / "latest_owid_covid_data.csv.gz"]
+        existing_links = [link for link in latest_links if link.exists()]
         
-        if not latest_file.exists():
+        if existing_links:
+            latest_file = max(existing_links, key=lambda x: x.stat().st_mtime)
+        else:
             # Fallback : cherche le fichier le plus récent
-            raw_files = list(RAW_DIR.glob("owid_covid_data_*.csv"))
+            raw_files = list(RAW_DIR.glob("owid_covid_data_*.csv")) + list(RAW_DIR.glob("owid_covid_data_*.csv.gz"))
             if not raw_files:
                 raise FileNotFoundError("Aucun fichier de données brutes trouvé")
             latest_file = max(raw_files, key=lambda x: x.stat().st_mtime)
         
         logger.info(f"Chargement des données depuis : {latest_file}")
-        df = pd.read_csv(latest_file)
         
-        logger.info(f"Données chargées : {len(df):,} lignes, {len(df.columns)} colonnes")
+        # Parseur PyArrow (multithread) limité aux colonnes utiles présentes dans l'en-tête
+        header = pd.read_csv(latest_file, nrows=0).columns
+        include_columns = [col for col in CORE_COLUMNS if col in header]
+        
+        # Numériques en float64 (NaN pour les vides, même si une colonne est entièrement vide)
+        column_types = {col: pa.float64() for col in include_columns if col not in ['iso_code', 'location', 'date']}
+        column_types['date'] = pa.timestamp('s')
+        
+        table = pacsv.read_csv(
+            latest_file,
+            convert_options=pacsv.ConvertOptions(
+                include_columns=include_columns,
+                column_types=column_types,
+                strings_can_be_null=True
+            )
+        )
+        
+        # Filtrage des pays d'intérêt dans Arrow : seules ces lignes sont converties en pandas
+        table = table.filter(pc.is_in(table['iso_code'], value_set=pa.array(TARGET_COUNTRIES)))
+        df = table.to_pandas()
+        
+        logger.info(f"Données chargées (pays d'intérêt) : {len(df):,} lignes, {len(df.columns)} colonnes")
         return df
         
     except Exception as e:
@@ -89,7 +127,12 @@ def filter_and_clean(df):
         df_filtered = df_filtered[df_filtered['date'] >= cutoff_date]
         logger.info(f"Après filtrage temporel (depuis {cutoff_date.date()}) : {len(df_filtered):,} lignes")
         
-        # 5. Tri par pays et date
+        # 5. Colonnes répétées en category (codes entiers pour groupby/comparaisons, Parquet plus léger)
+        df_filtered['iso_code'] = pd.Categorical(df_filtered['iso_code'], categories=TARGET_COUNTRIES)
+        if 'location' in df_filtered.columns:
+            df_filtered['location'] = df_filtered['location'].astype('category')
+        
+        # 6. Tri par pays (ordre de TARGET_COUNTRIES) et date
         df_filtered = df_filtered.sort_values(['iso_code', 'date']).reset_index(drop=True)
         
         return df_filtered
@@ -113,28 +156,22 @@ def handle_missing_values(df):
         
         # Stratégies par type de colonne
         
-        # 1. Colonnes cumulatives : forward fill par pays
-        cumulative_cols = ['total_cases', 'total_deaths', 'total_vaccinations', 
-                          'people_vaccinated', 'people_fully_vaccinated']
+        # 1. Colonnes cumulatives, population (change rarement) et stringency index :
+        #    forward fill par pays, en un seul passage groupby
+        ffill_cols = ['total_cases', 'total_deaths', 'total_vaccinations',
+                      'people_vaccinated', 'people_fully_vaccinated',
+                      'population', 'stringency_index']
+        ffill_present = [col for col in ffill_cols if col in df.columns]
         
-        for col in cumulative_cols:
-            if col in df.columns:
-                df[col] = df.groupby('iso_code')[col].fillna(method='ffill')
+        if ffill_present:
+            df[ffill_present] = df.groupby('iso_code', sort=False, observed=True)[ffill_present].ffill()
         
         # 2. Colonnes quotidiennes : 0 pour les valeurs manquantes
         daily_cols = ['new_cases', 'new_deaths', 'new_vaccinations']
+        daily_present = [col for col in daily_cols if col in df.columns]
         
-        for col in daily_cols:
-            if col in df.columns:
-                df[col] = df[col].fillna(0)
-        
-        # 3. Population : forward fill (ne change pas souvent)
-        if 'population' in df.columns:
-            df['population'] = df.groupby('iso_code')['population'].fillna(method='ffill')
-        
-        # 4. Stringency index : interpolation
-        if 'stringency_index' in df.columns:
-            df['stringency_index'] = df.groupby('iso_code')['stringency_index'].fillna(method='ffill')
+        if daily_present:
+            df[daily_present] = df[daily_present].fillna(0)
         
         logger.info("✅ Gestion des valeurs manquantes terminée")
         return df
@@ -158,29 +195,50 @@ def calculate_derived_metrics(df):
         
         # 3. Case Fatality Rate (CFR)
         if 'total_deaths' in df.columns and 'total_cases' in df.columns:
-            df['case_fatality_rate'] = np.where(
-                df['total_cases'] > 0,
-                (df['total_deaths'] / df['total_cases']) * 100,
-                0
-            )
+            # Division restreinte aux dénominateurs > 0 (0 ailleurs, sans RuntimeWarning)
+            total_deaths = df['total_deaths'].to_numpy(dtype=np.float64)
+            total_cases = df['total_cases'].to_numpy(dtype=np.float64)
+            cfr = np.zeros_like(total_cases)
+            np.divide(total_deaths, total_cases, out=cfr, where=total_cases > 0)
+            df['case_fatality_rate'] = cfr * 100
         
         # 4. Moyennes mobiles sur 7 jours
         rolling_cols = ['new_cases', 'new_deaths', 'incidence_rate_100k']
         
-        for col in rolling_cols:
-            if col in df.columns:
-                new_col_name = f'{col}_7day_avg'
-                df[new_col_name] = df.groupby('iso_code')[col].rolling(
-                    window=7, center=True, min_periods=1
-                ).mean().reset_index(drop=True)
+        rolling_present = [col for col in rolling_cols if col in df.columns]
+        
+        if rolling_present:
+            # transform : résultat aligné sur l'index d'origine, sans MultiIndex intermédiaire
+            rolling_means = df.groupby('iso_code', sort=False, observed=True)[rolling_present].transform(
+                lambda s: s.rolling(window=7, center=True, min_periods=1).mean()
+            )
+            for col in rolling_present:
+                df[f'{col}_7day_avg'] = rolling_means[col]
         
         # 5. Pourcentage de population vaccinée
         if 'people_fully_vaccinated' in df.columns and 'population' in df.columns:
-            df['vaccination_rate'] = np.where(
-                df['population'] > 0,
-                (df['people_fully_vaccinated'] / df['population']) * 100,
-                0
-            )
+            fully_vaccinated = df['people_fully_vaccinated'].to_numpy(dtype=np.float64)
+            population = df['population'].to_numpy(dtype=np.float64)
+            vaccination_rate = np.zeros_like(population)
+            np.divide(fully_vaccinated, population, out=vaccination_rate, where=population > 0)
+            df['vaccination_rate'] = vaccination_rate * 100
+        
+        # 6. Score de qualité des données (pré-calculé ici, relu tel quel par l'ETL PostgreSQL)
+        key_fields = ['new_cases', 'total_cases', 'population']
+        if all(col in df.columns for col in key_fields):
+            score = np.full(len(df), 100.0)
+            for col in key_fields:
+                score -= 15 * df[col].isna().to_numpy()
+            score -= 10 * (df['new_cases'] < 0).fillna(False).to_numpy()
+            if 'case_fatality_rate' in df.columns:
+                score -= 5 * (df['case_fatality_rate'] > 20).fillna(False).to_numpy()
+            df['data_quality_score'] = np.clip(score, 0, None)
+        
+        # 7. Indicateurs d'alerte (booléens, NaN -> False)
+        if 'incidence_rate_100k' in df.columns:
+            df['is_high_incidence'] = df['incidence_rate_100k'] > HIGH_INCIDENCE_THRESHOLD
+        if 'case_fatality_rate' in df.columns:
+            df['is_high_cfr'] = df['case_fatality_rate'] > HIGH_CFR_THRESHOLD
         
         logger.info(f"✅ Métriques dérivées calculées. Nouvelles colonnes : {len(df.columns)}")
         return df
@@ -242,6 +300,9 @@ def save_processed_data(df):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         parquet_file = PROCESSED_DIR / f"covid_processed_{timestamp}.parquet"
         
+        # Réduction des types numériques (iso_code/location restent en category)
+        df = df.astype({col: dtype for col, dtype in PARQUET_DTYPES.items() if col in df.columns})
+        
         # Sauvegarde en Parquet avec compression
         df.to_parquet(
             parquet_file,
@@ -284,11 +345,13 @@ def main():
         # 4. Calculer les métriques dérivées
         df = calculate_derived_metrics(df)
         
-        # 5. Générer le rapport de qualité
-        quality_report = generate_quality_report(df)
-        
-        # 6. Sauvegarder les données traitées
-        output_file = save_processed_data(df)
+        # 5-6. Rapport de qualité et sauvegarde Parquet : étapes indépendantes (lecture seule de df),
+        # exécutées en parallèle (l'écriture Parquet libère le GIL)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            report_future = executor.submit(generate_quality_report, df)
+            output_future = executor.submit(save_processed_data, df)
+            quality_report = report_future.result()
+            output_file = output_future.result()
         
         logger.info("✅ Processus de transformation terminé avec succès")
         logger.info(f"Fichier de sortie : {output_file}")
@@ -10,8 +10,14 @@ from airflow.utils.dates import days_ago
 from airflow.utils.task_group import TaskGroup
 
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import requests
 import logging
+import shutil
+import os
 import sys
 
 # Configuration du DAG
@@ -26,6 +32,7 @@ PROCESSED_DIR = BASE_DIR / 'processed'
 
 # Configuration des données
 RAW_DATA_URL = "https://raw.githubusercontent.com/owid/covid-19-data/master/public/data/owid-covid-data.csv"
+DOWNLOAD_BUFFER_SIZE = 4 * 1024 * 1024  # Taille des écritures du téléchargement
 
 # Arguments par défaut pour les tâches
 default_args = {
@@ -56,40 +63,39 @@ def check_data_source_availability():
         else:
             raise Exception(f"Source inaccessible, status code: {response.status_code}")
     except Exception as e:
-        logging.error(f"❌ Source de données inaccessible: {e}")
+        logging.error("❌ Source de données inaccessible: %s", e)
         raise
 
 def download_covid_data():
     """Télécharge les données COVID depuis Our World in Data"""
     try:
-        logging.info(f"Début du téléchargement depuis {RAW_DATA_URL}")
-        
-        # Téléchargement
-        response = requests.get(RAW_DATA_URL, timeout=300)  # 5 min timeout
-        response.raise_for_status()
+        logging.info("Début du téléchargement depuis %s", RAW_DATA_URL)
         
         # Génération du nom de fichier avec timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"owid_covid_data_{timestamp}.csv"
         filepath = RAW_DIR / filename
         
-        # Sauvegarde
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(response.text)
+        # Téléchargement en streaming, écrit directement sur disque (pas de copie du CSV en mémoire)
+        with requests.get(RAW_DATA_URL, stream=True, timeout=300) as response:  # 5 min timeout
+            response.raise_for_status()
+            response.raw.decode_content = True  # décompression gzip/deflate éventuelle
+            with open(filepath, 'wb', buffering=DOWNLOAD_BUFFER_SIZE) as f:
+                shutil.copyfileobj(response.raw, f, length=DOWNLOAD_BUFFER_SIZE)
         
-        # Création du lien symbolique
+        # Création du lien symbolique : lien temporaire puis substitution atomique (jamais de "latest" absent)
         latest_link = RAW_DIR / "latest_owid_covid_data.csv"
-        if latest_link.exists():
-            latest_link.unlink()
-        latest_link.symlink_to(filename)
+        staged_link = RAW_DIR / f"latest_owid_covid_data.csv.{os.getpid()}.tmp"
+        staged_link.symlink_to(filename)
+        os.replace(staged_link, latest_link)
         
         file_size_mb = filepath.stat().st_size / (1024*1024)
-        logging.info(f"✅ Données téléchargées: {filepath} ({file_size_mb:.2f} MB)")
+        logging.info("✅ Données téléchargées: %s (%.2f MB)", filepath, file_size_mb)
         
         return str(filepath)
         
     except Exception as e:
-        logging.error(f"❌ Erreur lors du téléchargement: {e}")
+        logging.error("❌ Erreur lors du téléchargement: %s", e)
         raise
 
 def validate_raw_data():
@@ -100,37 +106,48 @@ def validate_raw_data():
         if not latest_file.exists():
             raise FileNotFoundError("Fichier de données non trouvé")
         
-        # Lecture et validation
-        df = pd.read_csv(latest_file)
-        
-        # Vérifications critiques
+        # Vérifications critiques (sur l'en-tête seul)
         required_columns = ['date', 'location', 'iso_code', 'total_cases', 'new_cases']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        header = pd.read_csv(latest_file, nrows=0).columns
+        missing_columns = [col for col in required_columns if col not in header]
         
         if missing_columns:
             raise ValueError(f"Colonnes manquantes: {missing_columns}")
         
+        # Lecture des seules colonnes utiles aux statistiques (fraîcheur, période, pays) avec le parseur
+        # PyArrow ; agrégats calculés directement sur les colonnes Arrow, sans conversion pandas
+        table = pacsv.read_csv(
+            latest_file,
+            convert_options=pacsv.ConvertOptions(
+                include_columns=['date', 'location'],
+                column_types={'date': pa.date32()},
+                strings_can_be_null=True  # champs vides -> null, comme NaN en pandas
+            )
+        )
+        date_range = pc.min_max(table['date']).as_py()
+        min_date, max_date = date_range['min'], date_range['max']
+        
         # Vérification de la fraîcheur des données
-        df['date'] = pd.to_datetime(df['date'])
-        latest_date = df['date'].max()
-        days_old = (datetime.now().date() - latest_date.date()).days
+        if max_date is None:
+            raise ValueError("Aucune date valide dans le fichier")
+        days_old = (datetime.now().date() - max_date).days
         
         if days_old > 7:
-            logging.warning(f"⚠️ Données anciennes: {days_old} jours")
+            logging.warning("⚠️ Données anciennes: %d jours", days_old)
         
         # Statistiques de validation
         stats = {
-            'rows': len(df),
-            'countries': df['location'].nunique(),
-            'date_range': f"{df['date'].min().date()} à {df['date'].max().date()}",
+            'rows': table.num_rows,
+            'countries': pc.count_distinct(table['location']).as_py(),
+            'date_range': f"{min_date} à {max_date}",
             'data_age_days': days_old
         }
         
-        logging.info(f"✅ Validation réussie: {stats}")
+        logging.info("✅ Validation réussie: %s", stats)
         return stats
         
     except Exception as e:
-        logging.error(f"❌ Échec de la validation: {e}")
+        logging.error("❌ Échec de la validation: %s", e)
         raise
 
 def transform_data():
@@ -142,16 +159,17 @@ def transform_data():
         # Exécute le script de transformation
         df, quality_report = transform_main()
         
-        # Log des résultats
-        logging.info(f"✅ Transformation terminée:")
-        logging.info(f"  - Lignes traitées: {len(df):,}")
-        logging.info(f"  - Pays: {df['iso_code'].nunique()}")
-        logging.info(f"  - Colonnes: {len(df.columns)}")
+        # Log des résultats (nunique évité si le niveau INFO est filtré)
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info("✅ Transformation terminée:")
+            logging.info("  - Lignes traitées: %s", format(len(df), ','))
+            logging.info("  - Pays: %d", df['iso_code'].nunique())
+            logging.info("  - Colonnes: %d", len(df.columns))
         
         return quality_report
         
     except Exception as e:
-        logging.error(f"❌ Erreur lors de la transformation: {e}")
+        logging.error("❌ Erreur lors de la transformation: %s", e)
         raise
 
 def data_quality_checks():
@@ -168,30 +186,30 @@ def data_quality_checks():
         quality_issues = []
         
         # 1. Vérification des valeurs négatives dans les nouveaux cas
-        negative_cases = df[df['new_cases'] < 0]
-        if len(negative_cases) > 0:
-            quality_issues.append(f"Valeurs négatives dans new_cases: {len(negative_cases)} lignes")
+        #    (comptage sur le tableau NumPy, sans DataFrame filtré ; Int32 nullable -> NaN)
+        negative_cases = int((df['new_cases'].to_numpy(dtype=np.float64, na_value=np.nan) < 0).sum())
+        if negative_cases > 0:
+            quality_issues.append(f"Valeurs négatives dans new_cases: {negative_cases} lignes")
         
-        # 2. Vérification de la cohérence des données cumulatives
-        for country in df['iso_code'].unique():
-            country_data = df[df['iso_code'] == country].sort_values('date')
-            if 'total_cases' in country_data.columns:
-                # Vérifier que les totaux sont croissants (ou stables)
-                decreasing = country_data['total_cases'].diff() < -1000  # Tolérance pour corrections
-                if decreasing.any():
-                    quality_issues.append(f"Totaux décroissants détectés pour {country}")
+        # 2. Vérification de la cohérence des données cumulatives (un tri, un diff groupé)
+        if 'total_cases' in df.columns:
+            df_sorted = df.sort_values(['iso_code', 'date'], kind='stable')
+            # Vérifier que les totaux sont croissants (ou stables)
+            decreasing = df_sorted.groupby('iso_code', sort=False, observed=True)['total_cases'].diff() < -1000  # Tolérance pour corrections
+            for country in df_sorted.loc[decreasing, 'iso_code'].unique():
+                quality_issues.append(f"Totaux décroissants détectés pour {country}")
         
         # 3. Vérification des taux calculés
         if 'incidence_rate_100k' in df.columns:
-            extreme_rates = df[df['incidence_rate_100k'] > 1000]  # Plus de 1000 cas / 100k habitants
-            if len(extreme_rates) > 0:
-                quality_issues.append(f"Taux d'incidence extrêmes: {len(extreme_rates)} observations")
+            extreme_rates = int((df['incidence_rate_100k'].to_numpy(dtype=np.float64, na_value=np.nan) > 1000).sum())  # Plus de 1000 cas / 100k habitants
+            if extreme_rates > 0:
+                quality_issues.append(f"Taux d'incidence extrêmes: {extreme_rates} observations")
         
         # Résultats
         if quality_issues:
-            logging.warning(f"⚠️ Problèmes de qualité détectés:")
+            logging.warning("⚠️ Problèmes de qualité détectés:")
             for issue in quality_issues:
-                logging.warning(f"  - {issue}")
+                logging.warning("  - %s", issue)
         else:
             logging.info("✅ Tous les tests de qualité sont passés")
         
@@ -205,7 +223,7 @@ def data_quality_checks():
         return quality_summary
         
     except Exception as e:
-        logging.error(f"❌ Erreur lors des vérifications qualité: {e}")
+        logging.error("❌ Erreur lors des vérifications qualité: %s", e)
         raise
 
 def send_success_notification(**context):
@@ -4,12 +4,17 @@ Script d'ingestion pour la surveillance épidémiologique
 Source: Our World in Data COVID-19 dataset
 """
 
-import pandas as pd
-import requests
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
 import logging
+import json
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+# requests et pyarrow sont importés dans les fonctions qui les utilisent : l'import du module
+# (parsing des DAGs Airflow) reste quasi instantané
 
 # Configuration
 RAW_DATA_URL = "https://raw.githubusercontent.com/owid/covid-19-data/master/public/data/owid-covid-data.csv"
@@ -17,6 +22,19 @@ DATA_DIR = Path("data")
 RAW_DIR = DATA_DIR / "raw" 
 PROCESSED_DIR = DATA_DIR / "processed"
 
+# En-têtes de cache HTTP (ETag, Last-Modified) du dernier téléchargement, pour les GET conditionnels
+LATEST_META_FILE = RAW_DIR / ".latest_meta.json"
+
+# Taille des écritures du téléchargement (moins d'appels write() que le tampon par défaut de 8 Ko)
+DOWNLOAD_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Téléchargement parallèle par requêtes Range (si le serveur ne compresse pas et accepte les Range)
+RANGE_PARTS = 4
+RANGE_MIN_SIZE = 32 * 1024 * 1024
+
+# Taille des blocs lus en flux lors de la validation (mémoire bornée à un bloc)
+CSV_BLOCK_SIZE = 16 * 1024 * 1024
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,240 +46,315 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def get_session():
+    """Session HTTP partagée (keep-alive) avec retries et backoff exponentiel sur les erreurs transitoires"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(max_retries=Retry(
+        total=5,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('HEAD', 'GET')
+    )))
+    return session
+
 def setup_directories():
     """Crée la structure des dossiers si elle n'existe pas"""
     for directory in [RAW_DIR, PROCESSED_DIR]:
         directory.mkdir(parents=True, exist_ok=True)
     logger.info("Structure des dossiers créée")
 
-def download_data():
-    """Télécharge les données depuis Our World in Data"""
+def load_latest_meta():
+    """Lit les en-têtes de cache du dernier téléchargement ({} si absents ou fichier disparu)"""
     try:
-        logger.info(f"Début du téléchargement depuis {RAW_DATA_URL}")
-        
-        # Téléchargement avec timeout
-        response = requests.get(RAW_DATA_URL, timeout=30)
-        response.raise_for_status()
-        
-        # Génération du nom de fichier avec timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"owid_covid_data_{timestamp}.csv"
-        filepath = RAW_DIR / filename
-        
-        # Sauvegarde
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        
-        logger.info(f"Données téléchargées avec succès : {filepath}")
-        logger.info(f"Taille du fichier : {filepath.stat().st_size / (1024*1024):.2f} MB")
-        
-        return filepath
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Erreur lors du téléchargement : {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Erreur inattendue : {e}")
-        raise
+        meta = json.loads(LATEST_META_FILE.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+    
+    # Sans le fichier correspondant, un 304 ne servirait à rien : téléchargement complet
+    if not (RAW_DIR / meta.get('filename', '')).is_file():
+        return {}
+    return meta
 
-def validate_data(filepath):
-    """Valide basiquement les données téléchargées"""
-    try:
-        logger.info("Début de la validation des données")
-        
-        # Lecture du fichier
-        df = pd.read_csv(filepath)
-        
-        # Vérifications de base
-        logger.info(f"Nombre de lignes : {len(df):,}")
-        logger.info(f"Nombre de colonnes : {len(df.columns)}")
-        logger.info(f"Période couverte : {df['date'].min()} à {df['date'].max()}")
-        logger.info(f"Nombre de pays : {df['location'].nunique()}")
-        
-        # Vérifications critiques
-        required_columns = ['date', 'location', 'total_cases', 'new_cases']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            raise ValueError(f"Colonnes manquantes : {missing_columns}")
-        
-        # Vérification que nous avons des données récentes (dernières 7 jours)
-        df['date'] = pd.to_datetime(df['date'])
-        latest_date = df['date'].max()
-        days_old = (datetime.now().date() - latest_date.date()).days
-        
-        if days_old > 7:
-            logger.warning(f"Données anciennes : {days_old} jours")
-        else:
-            logger.info(f"Données récentes : {days_old} jours d'ancienneté")
-        
-        logger.info("✅ Validation des données réussie")
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Erreur lors de la validation : {e}")
-        raise
+def save_latest_meta(meta):
+    """Mémorise les en-têtes de cache pour le prochain GET conditionnel"""
+    LATEST_META_FILE.write_text(json.dumps(meta))
 
-def create_latest_symlink(filepath):
-    """Crée un lien symbolique vers le fichier le plus récent"""
-    try:
-        latest_link = RAW_DIR / "latest_owid_covid_data.csv"
-        
-        # Supprime l'ancien lien s'il existe
-        if latest_link.exists():
-            latest_link.unlink()
-        
-        # Crée le nouveau lien
-        latest_link.symlink_to(filepath.name)
-        logger.info(f"Lien symbolique créé : {latest_link}")
-        
-    except Exception as e:
-        logger.error(f"Erreur lors de la création du lien symbolique : {e}")
-        # Non critique, on continue
+def keep_existing_download(meta):
+    """Données inchangées : conserve le fichier du dernier téléchargement (simple stat, pas de revalidation)"""
+    filepath = RAW_DIR / meta['filename']
+    logger.info("Données inchangées, fichier existant conservé : %s", filepath)
+    logger.info("Taille du fichier : %.2f MB", filepath.stat().st_size / (1024*1024))
+    return filepath, None
 
-def main():
-    """Fonction principale d'ingestion"""
+def write_atomically(filepath, write):
+    """Écrit via write(fd) dans un fichier temporaire, un seul fdatasync final, puis renommage atomique"""
+    tmp_path = filepath.with_name(filepath.name + '.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
     try:
-        logger.info("🚀 Début du processus d'ingestion")
-        
-        # 1. Configuration des dossiers
-        setup_directories()
-        
-        # 2. Téléchargement
-        filepath = download_data()
-        
-        # 3. Validation
-        validate_data(filepath)
-        
-        # 4. Création du lien symbolique
-        create_latest_symlink(filepath)
-        
-        logger.info("✅ Processus d'ingestion terminé avec succès")
-        
-    except Exception as e:
-        logger.error(f"❌ Échec du processus d'ingestion : {e}")
+        try:
+            write(fd)
+            os.fdatasync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
         raise
 
-if __name__ == "__main__":
-    main()#!/usr/bin/env python3
-"""
-Script d'ingestion pour la surveillance épidémiologique
-Source: Our World in Data COVID-19 dataset
-"""
-
-import pandas as pd
-import requests
-from pathlib import Path
-from datetime import datetime
-import logging
-import os
-
-# Configuration
-RAW_DATA_URL = "https://raw.githubusercontent.com/owid/covid-19-data/master/public/data/owid-covid-data.csv"
-DATA_DIR = Path("data")
-RAW_DIR = DATA_DIR / "raw" 
-PROCESSED_DIR = DATA_DIR / "processed"
+def preallocate(fd, size):
+    """Réserve size octets d'un seul tenant (posix_fallocate), si la plateforme et le système de fichiers le permettent"""
+    if not size or not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError:
+        pass  # non supporté (ex. certains montages réseau) : allocation au fil de l'écriture
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('ingestion.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+class RangeDownloadError(Exception):
+    """Requête Range non honorée ou partie incomplète : repli sur le téléchargement en flux unique"""
 
-def setup_directories():
-    """Crée la structure des dossiers si elle n'existe pas"""
-    for directory in [RAW_DIR, PROCESSED_DIR]:
-        directory.mkdir(parents=True, exist_ok=True)
-    logger.info("Structure des dossiers créée")
+def download_ranges(filepath, size, etag=None):
+    """Télécharge le fichier en RANGE_PARTS requêtes Range parallèles, écrites à leur offset (os.pwrite)"""
+    # If-Range n'accepte que les validateurs forts (RFC 9110) : un ETag faible donnerait toujours 200
+    if etag and etag.startswith('W/'):
+        etag = None
+    
+    part_size = -(-size // RANGE_PARTS)
+    byte_ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+    
+    def write(fd):
+        os.ftruncate(fd, size)  # taille finale
+        preallocate(fd, size)  # blocs réservés d'un seul tenant
+        
+        def fetch(byte_range):
+            start, end = byte_range
+            headers = {'Range': f'bytes={start}-{end}', 'Accept-Encoding': 'identity'}
+            if etag:
+                headers['If-Range'] = etag  # fichier modifié entre deux parties -> 200 complet, rejeté
+            with get_session().get(RAW_DATA_URL, stream=True, timeout=(10, 60), headers=headers) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise RangeDownloadError(f"Requête Range non honorée (status {response.status_code})")
+                offset = start
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_BUFFER_SIZE):
+                    view = memoryview(chunk)
+                    while view:
+                        written = os.pwrite(fd, view, offset)
+                        view = view[written:]
+                        offset += written
+            if offset != end + 1:
+                raise RangeDownloadError(f"Partie incomplète : octets {start}-{end}, reçu jusqu'à {offset - 1}")
+        
+        with ThreadPoolExecutor(max_workers=RANGE_PARTS) as executor:
+            list(executor.map(fetch, byte_ranges))
+    
+    write_atomically(filepath, write)
 
 def download_data():
-    """Télécharge les données depuis Our World in Data"""
+    """Télécharge les données depuis Our World in Data
+
+    Retourne (filepath, cache_meta) : cache_meta vaut None si le serveur répond 304 (fichier inchangé).
+    """
+    import requests
+    
     try:
-        logger.info(f"Début du téléchargement depuis {RAW_DATA_URL}")
+        logger.info("Début du téléchargement depuis %s", RAW_DATA_URL)
         
-        # Téléchargement avec timeout
-        response = requests.get(RAW_DATA_URL, timeout=30)
-        response.raise_for_status()
+        # GET conditionnel à partir des en-têtes du dernier téléchargement
+        meta = load_latest_meta()
+        headers = {'Accept-Encoding': 'gzip'}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
         
         # Génération du nom de fichier avec timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"owid_covid_data_{timestamp}.csv"
-        filepath = RAW_DIR / filename
         
-        # Sauvegarde
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        
-        logger.info(f"Données téléchargées avec succès : {filepath}")
-        logger.info(f"Taille du fichier : {filepath.stat().st_size / (1024*1024):.2f} MB")
-        
-        return filepath
+        # Sonde HEAD : fichier inchangé (304), compression proposée, support des Range
+        probe = get_session().head(RAW_DATA_URL, timeout=(10, 60), headers=headers, allow_redirects=True)
+        if probe.status_code == 304:
+            return keep_existing_download(meta)
+        probe.raise_for_status()
+        
+        is_gzip = probe.headers.get('Content-Encoding', '').lower() == 'gzip'
+        size = int(probe.headers.get('Content-Length') or 0)
+        
+        use_ranges = not is_gzip and probe.headers.get('Accept-Ranges') == 'bytes' and size >= RANGE_MIN_SIZE
+        if use_ranges:
+            # Pas de compression disponible : parties téléchargées en parallèle
+            filepath = RAW_DIR / f"owid_covid_data_{timestamp}.csv"
+            logger.info("Téléchargement en %d parties parallèles (%.2f MB)", RANGE_PARTS, size / (1024*1024))
+            try:
+                download_ranges(filepath, size, etag=probe.headers.get('ETag'))
+            except RangeDownloadError as e:
+                # Proxy/CDN ignorant les Range, ou fichier modifié entre deux parties
+                logger.warning("Téléchargement par parties impossible (%s) : repli sur le flux unique", e)
+                use_ranges = False
+            else:
+                response_headers = probe.headers
+                file_size = size
+                sha256 = None
+        
+        if not use_ranges:
+            # Téléchargement compressé en streaming avec timeout (connexion, lecture), écrit directement sur disque
+            with get_session().get(RAW_DATA_URL, stream=True, timeout=(10, 60), headers=headers) as response:
+                if response.status_code == 304:
+                    return keep_existing_download(meta)
+                response.raise_for_status()
+                
+                # Payload gzip conservé tel quel (.csv.gz, décompressé par pandas à la lecture)
+                is_gzip = response.headers.get('Content-Encoding', '').lower() == 'gzip'
+                filename = f"owid_covid_data_{timestamp}.csv.gz" if is_gzip else f"owid_covid_data_{timestamp}.csv"
+                filepath = RAW_DIR / filename
+                response.raw.decode_content = not is_gzip
+                
+                # Écriture atomique : fichier temporaire, un seul fdatasync final, puis renommage
+                # Empreinte SHA-256 et taille calculées au fil de la copie
+                digest = hashlib.sha256()
+                content_length = int(response.headers.get('Content-Length') or 0)
+                
+                def write(fd):
+                    nonlocal file_size
+                    preallocate(fd, content_length)  # octets reçus tels quels (gzip non décodé)
+                    with open(fd, 'wb', buffering=DOWNLOAD_BUFFER_SIZE, closefd=False) as f:
+                        while True:
+                            buf = response.raw.read(DOWNLOAD_BUFFER_SIZE)
+                            if not buf:
+                                break
+                            digest.update(buf)
+                            f.write(buf)
+                            file_size += len(buf)
+                    
+                    # Taille réelle différente (autre encodage décodé) : fichier ramené aux octets écrits
+                    if content_length and file_size != content_length:
+                        os.ftruncate(fd, file_size)
+                
+                file_size = 0
+                write_atomically(filepath, write)
+                response_headers = response.headers
+                sha256 = digest.hexdigest()
+                
+                # Contenu identique au dernier téléchargement (serveur sans ETag) : fichier existant conservé
+                if sha256 == meta.get('sha256'):
+                    filepath.unlink()
+                    return keep_existing_download(meta)
+        
+        cache_meta = {
+            'filename': filepath.name,
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'sha256': sha256
+        }
+        
+        logger.info("Données téléchargées avec succès : %s", filepath)
+        logger.info("Taille du fichier : %.2f MB", file_size / (1024*1024))
+        
+        return filepath, cache_meta
         
     except requests.exceptions.RequestException as e:
-        logger.error(f"Erreur lors du téléchargement : {e}")
+        logger.error("Erreur lors du téléchargement : %s", e)
         raise
     except Exception as e:
-        logger.error(f"Erreur inattendue : {e}")
+        logger.error("Erreur inattendue : %s", e)
         raise
 
 def validate_data(filepath):
     """Valide basiquement les données téléchargées"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pac
+    
     try:
         logger.info("Début de la validation des données")
         
-        # Lecture du fichier
-        df = pd.read_csv(filepath)
-        
-        # Vérifications de base
-        logger.info(f"Nombre de lignes : {len(df):,}")
-        logger.info(f"Nombre de colonnes : {len(df.columns)}")
-        logger.info(f"Période couverte : {df['date'].min()} à {df['date'].max()}")
-        logger.info(f"Nombre de pays : {df['location'].nunique()}")
+        # En-tête seul (premier bloc) pour la vérification des colonnes
+        columns = pac.open_csv(filepath).schema.names
         
         # Vérifications critiques
         required_columns = ['date', 'location', 'total_cases', 'new_cases']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        missing_columns = [col for col in required_columns if col not in columns]
         
         if missing_columns:
             raise ValueError(f"Colonnes manquantes : {missing_columns}")
         
+        # Lecture en flux, bloc par bloc, des seules colonnes utiles aux statistiques : la mémoire reste
+        # bornée à un bloc (compression déduite de l'extension .gz)
+        # Pas de lecture de la dernière ligne : le fichier OWID est trié par pays, pas par date
+        reader = pac.open_csv(
+            filepath,
+            read_options=pac.ReadOptions(block_size=CSV_BLOCK_SIZE),
+            convert_options=pac.ConvertOptions(
+                include_columns=['date', 'location'],
+                column_types={'date': pa.string()},  # ISO-8601 : l'ordre lexicographique est chronologique
+                strings_can_be_null=True  # champs vides -> null, comme NaN en pandas
+            )
+        )
+        
+        num_rows = 0
+        batch_dates = []
+        batch_locations = []
+        for batch in reader:
+            num_rows += batch.num_rows
+            batch_range = pc.min_max(batch.column('date'))
+            batch_dates.extend(d for d in (batch_range['min'].as_py(), batch_range['max'].as_py()) if d is not None)
+            batch_locations.append(pc.unique(batch.column('location')))
+        
+        # Seules les deux bornes sont converties en date
+        min_date = datetime.strptime(min(batch_dates), '%Y-%m-%d').date() if batch_dates else None
+        max_date = datetime.strptime(max(batch_dates), '%Y-%m-%d').date() if batch_dates else None
+        country_count = pc.count_distinct(pa.chunked_array(batch_locations, type=pa.string())).as_py()
+        
+        # Vérifications de base
+        logger.info("Nombre de lignes : %s", format(num_rows, ','))
+        logger.info("Nombre de colonnes : %d", len(columns))
+        logger.info("Période couverte : %s à %s", min_date, max_date)
+        logger.info("Nombre de pays : %s", country_count)
+        
         # Vérification que nous avons des données récentes (dernières 7 jours)
-        df['date'] = pd.to_datetime(df['date'])
-        latest_date = df['date'].max()
-        days_old = (datetime.now().date() - latest_date.date()).days
+        if max_date is None:
+            raise ValueError("Aucune date valide dans le fichier")
+        days_old = (datetime.now().date() - max_date).days
         
         if days_old > 7:
-            logger.warning(f"Données anciennes : {days_old} jours")
+            logger.warning("Données anciennes : %d jours", days_old)
         else:
-            logger.info(f"Données récentes : {days_old} jours d'ancienneté")
+            logger.info("Données récentes : %d jours d'ancienneté", days_old)
         
         logger.info("✅ Validation des données réussie")
         return True
         
     except Exception as e:
-        logger.error(f"❌ Erreur lors de la validation : {e}")
+        logger.error("❌ Erreur lors de la validation : %s", e)
         raise
 
 def create_latest_symlink(filepath):
     """Crée un lien symbolique vers le fichier le plus récent"""
     try:
-        latest_link = RAW_DIR / "latest_owid_covid_data.csv"
+        # Même extension que la cible (.csv ou .csv.gz) pour que la compression soit déduite à la lecture
+        suffix = ".csv.gz" if filepath.name.endswith(".gz") else ".csv"
+        latest_link = RAW_DIR / f"latest_owid_covid_data{suffix}"
+        
+        # Crée le nouveau lien à côté puis le substitue atomiquement (jamais de "latest" absent)
+        # (nom propre au processus : deux ingestions concurrentes ne se marchent pas dessus)
+        staged_link = RAW_DIR / f"{latest_link.name}.{os.getpid()}.tmp"
+        staged_link.symlink_to(filepath.name)
+        os.replace(staged_link, latest_link)
         
-        # Supprime l'ancien lien s'il existe
-        if latest_link.exists():
-            latest_link.unlink()
+        # Supprime le lien de l'autre format s'il existe
+        for link in [RAW_DIR / "latest_owid_covid_data.csv", RAW_DIR / "latest_owid_covid_data.csv.gz"]:
+            if link != latest_link and (link.is_symlink() or link.exists()):
+                link.unlink()
         
-        # Crée le nouveau lien
-        latest_link.symlink_to(filepath.name)
-        logger.info(f"Lien symbolique créé : {latest_link}")
+        logger.info("Lien symbolique créé : %s", latest_link)
         
     except Exception as e:
-        logger.error(f"Erreur lors de la création du lien symbolique : {e}")
+        logger.error("Erreur lors de la création du lien symbolique : %s", e)
         # Non critique, on continue
 
 def main():
@@ -272,8 +365,11 @@ def main():
         # 1. Configuration des dossiers
         setup_directories()
         
-        # 2. Téléchargement
-        filepath = download_data()
+        # 2. Téléchargement (conditionnel : rien à faire si le fichier source est inchangé)
+        filepath, cache_meta = download_data()
+        if cache_meta is None:
+            logger.info("✅ Processus d'ingestion terminé : données déjà à jour")
+            return
         
         # 3. Validation
         validate_data(filepath)
@@ -281,11 +377,14 @@ def main():
         # 4. Création du lien symbolique
         create_latest_symlink(filepath)
         
+        # 5. En-têtes de cache mémorisés seulement pour un fichier validé
+        save_latest_meta(cache_meta)
+        
         logger.info("✅ Processus d'ingestion terminé avec succès")
         
     except Exception as e:
-        logger.error(f"❌ Échec du processus d'ingestion : {e}")
+        logger.error("❌ Échec du processus d'ingestion : %s", e)
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()